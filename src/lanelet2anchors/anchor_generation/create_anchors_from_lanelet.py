@@ -1,7 +1,8 @@
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from lanelet2.core import LaneletMap
-from lanelet2.routing import RoutingGraph
+import numpy as np
+from lanelet2.core import Lanelet, LaneletMap
+from lanelet2.routing import LaneletRelation, RoutingGraph
 
 from .anchor import Anchor
 from .discover_anchors import discover_anchors
@@ -14,10 +15,15 @@ def create_anchors_for_lanelet(
     lanelet_id: int,
     max_length: float = 100,
     distance_method: str = "iou",
+    relations_cache: Optional[Dict[Lanelet, List[LaneletRelation]]] = None,
+    lanelet_lengths: Optional[Dict[int, float]] = None,
+    coords_cache: Optional[Dict[Tuple[Lanelet, str], np.ndarray]] = None,
 ) -> List[Anchor]:
     start_lanelet = lanelet_map.laneletLayer[lanelet_id]
 
-    anchors = discover_anchors(routing_graph, start_lanelet, max_length)
-    anchors = sort_anchors(anchors, distance_method)
+    anchors = discover_anchors(
+        routing_graph, start_lanelet, max_length, relations_cache, lanelet_lengths
+    )
+    anchors = sort_anchors(anchors, distance_method, coords_cache)
 
     return [Anchor(lanelets=lanelets) for lanelets in anchors]
@@ -1,20 +1,39 @@
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import networkx as nx
-from lanelet2.core import Lanelet
-from lanelet2.routing import RelationType, RoutingGraph
+import numpy as np
+from lanelet2.core import Lanelet, LaneletMap
+from lanelet2.routing import LaneletRelation, RelationType, RoutingGraph
 
-from ..anchor_tools.anchor2linestring import _anchor2linestring
+from ..anchor_tools.interpolate_lanelet import _linestring2coords
+
+# the lanelet2 stubs declare the RelationType members as int
+LANE_CHANGE_FLAGS: Dict[Union[RelationType, int], int] = {
+    RelationType.Successor: 0b00,
+    RelationType.Left: 0b01,
+    RelationType.Right: 0b10,
+}
+BIDIRECTIONAL_LANE_CHANGES = 0b11  # changed left and right
 
 
 def discover_anchors(
     routing_graph: RoutingGraph,
     start_lanelet: Lanelet,
     max_length: float,
+    relations_cache: Optional[Dict[Lanelet, List[LaneletRelation]]] = None,
+    lanelet_lengths: Optional[Dict[int, float]] = None,
 ) -> List[Tuple[Lanelet, ...]]:
+    if relations_cache is None:
+        relations_cache = {}
+
+    if lanelet_lengths is None:
+        lanelet_lengths = {}
+
     G = nx.DiGraph()
-    G.add_node(0, lanelet=start_lanelet)
-    _traverse_routing_graph(G, routing_graph, start_lanelet, 0, max_length)
+    G.add_node(0, lanelet=start_lanelet, parent=None, length=0.0, lane_changes=0b00)
+    _traverse_routing_graph(
+        G, routing_graph, max_length, relations_cache, lanelet_lengths
+    )
 
     anchors = _graph2anchors(G)
 
@@ -24,69 +43,137 @@ def discover_anchors(
 def _traverse_routing_graph(
     G: nx.DiGraph,
     routing_graph: RoutingGraph,
-    current_lanelet: Lanelet,
-    current_id: int,
     max_length: float,
-) -> nx.DiGraph:
-    if _determine_anchor_length(G, current_id) > max_length:
-        return
-
-    following_lanelets = routing_graph.followingRelations(
-        current_lanelet, withLaneChanges=True
+    relations_cache: Dict[Lanelet, List[LaneletRelation]],
+    lanelet_lengths: Dict[int, float],
+) -> None:
+    stack = _expand_node(
+        G, routing_graph, 0, max_length, relations_cache, lanelet_lengths
     )
 
-    for relation in following_lanelets:
+    while stack:
+        current_id, relation, length, lane_changes = stack.pop()
         new_id = len(G.nodes)
 
-        G.add_node(new_id, lanelet=relation.lanelet)
+        G.add_node(
+            new_id,
+            lanelet=relation.lanelet,
+            parent=current_id,
+            length=length,
+            lane_changes=lane_changes,
+        )
         G.add_edge(current_id, new_id, relation_type=relation.relationType)
 
-        if _containes_bidirectional_lane_changes(G, new_id):
-            G.remove_node(new_id)
-            continue
+        stack.extend(
+            _expand_node(
+                G, routing_graph, new_id, max_length, relations_cache, lanelet_lengths
+            )
+        )
 
-        _traverse_routing_graph(G, routing_graph, relation.lanelet, new_id, max_length)
 
+def _expand_node(
+    G: nx.DiGraph,
+    routing_graph: RoutingGraph,
+    current_id: int,
+    max_length: float,
+    relations_cache: Dict[Lanelet, List[LaneletRelation]],
+    lanelet_lengths: Dict[int, float],
+) -> List[Tuple[int, LaneletRelation, float, int]]:
+    if G.nodes[current_id]["length"] > max_length:
+        return []
+
+    following_lanelets = _following_relations(
+        routing_graph, G.nodes[current_id]["lanelet"], relations_cache
+    )
 
-def _determine_anchor_length(G: nx.DiGraph, current_id: int) -> float:
-    ancestors_graph = _ancestors_graph(G, current_id)
-    ancestors_list = list(nx.topological_sort(ancestors_graph))
+    children = []
+    for relation in following_lanelets:
+        lane_changes = _extend_lane_changes(G, current_id, relation)
+        if lane_changes & BIDIRECTIONAL_LANE_CHANGES == BIDIRECTIONAL_LANE_CHANGES:
+            continue
 
-    anchor = tuple(G.nodes[ancestor]["lanelet"] for ancestor in ancestors_list)
-    anchor_short = anchor[1:]
+        length = _extend_anchor_length(G, current_id, relation, lanelet_lengths)
+        children.append((current_id, relation, length, lane_changes))
 
-    return _anchor2linestring(anchor_short, "centerline").length
+    # reversed, so that popping from the stack visits the nodes in depth-first pre-order
+    return list(reversed(children))
 
 
-def _graph2anchors(G: nx.DiGraph) -> List[Tuple[Lanelet, ...]]:
-    leafs = [node for node in G.nodes if G.out_degree(node) == 0]
+def _following_relations(
+    routing_graph: RoutingGraph,
+    lanelet: Lanelet,
+    relations_cache: Dict[Lanelet, List[LaneletRelation]],
+) -> List[LaneletRelation]:
+    if lanelet not in relations_cache:
+        relations_cache[lanelet] = routing_graph.followingRelations(
+            lanelet, withLaneChanges=True
+        )
 
-    anchors: List[Tuple[Lanelet, ...]] = []
-    for leaf in leafs:
-        ancestors_graph = _ancestors_graph(G, leaf)
-        ancestors_list = list(nx.topological_sort(ancestors_graph))
+    return relations_cache[lanelet]
 
-        lanelets: List[Lanelet] = [
-            G.nodes[ancestor]["lanelet"] for ancestor in ancestors_list
-        ]
-        anchors.append(tuple(lanelets))
 
-    return anchors
+def _extend_anchor_length(
+    G: nx.DiGraph,
+    current_id: int,
+    relation: LaneletRelation,
+    lanelet_lengths: Dict[int, float],
+) -> float:
+    # the start lanelet (node 0) is not part of the anchor length
+    length = G.nodes[current_id]["length"] + _lanelet_length(
+        relation.lanelet, lanelet_lengths
+    )
+
+    # lane changes are blended into one line: the neighbour replaces the current lanelet
+    if relation.relationType != RelationType.Successor and current_id != 0:
+        length -= _lanelet_length(G.nodes[current_id]["lanelet"], lanelet_lengths)
 
+    return length
 
-def _containes_bidirectional_lane_changes(G: nx.DiGraph, current_id: int) -> bool:
-    ancestors_graph = _ancestors_graph(G, current_id)
 
-    relation_types = set(
-        edge[2] for edge in ancestors_graph.edges(data="relation_type")
+def _extend_lane_changes(
+    G: nx.DiGraph, current_id: int, relation: LaneletRelation
+) -> int:
+    assert relation.relationType in LANE_CHANGE_FLAGS
+
+    return (
+        G.nodes[current_id]["lane_changes"] | LANE_CHANGE_FLAGS[relation.relationType]
     )
 
-    expected_types = {RelationType.Successor, RelationType.Left, RelationType.Right}
-    assert len(relation_types - expected_types) == 0
 
-    return RelationType.Left in relation_types and RelationType.Right in relation_types
+def _lanelet_length(lanelet: Lanelet, lanelet_lengths: Dict[int, float]) -> float:
+    if lanelet.id not in lanelet_lengths:
+        lanelet_lengths[lanelet.id] = _centerline_length(
+            _linestring2coords(lanelet.centerline)
+        )
+
+    return lanelet_lengths[lanelet.id]
+
+
+def _lanelet_lengths(lanelet_map: LaneletMap) -> Dict[int, float]:
+    return {
+        lanelet.id: _centerline_length(_linestring2coords(lanelet.centerline))
+        for lanelet in lanelet_map.laneletLayer
+    }
+
 
+def _centerline_length(coords: np.ndarray) -> float:
+    segments = np.diff(coords, axis=0)
+    return float(np.hypot(*segments.T).sum())
 
-def _ancestors_graph(G: nx.DiGraph, current_id: int) -> nx.DiGraph:
-    ancestors_set = nx.ancestors(G, current_id).union(set([current_id]))
-    return G.subgraph(ancestors_set)
+
+def _graph2anchors(G: nx.DiGraph) -> List[Tuple[Lanelet, ...]]:
+    leafs = [node for node in G.nodes if G.out_degree(node) == 0]
+
+    anchors: List[Tuple[Lanelet, ...]] = []
+    for leaf in leafs:
+        lanelets: List[Lanelet] = []
+
+        # the traversal graph is a tree, so the ancestors are found via the parents
+        node: Optional[int] = leaf
+        while node is not None:
+            lanelets.append(G.nodes[node]["lanelet"])
+            node = G.nodes[node]["parent"]
+
+        anchors.append(tuple(reversed(lanelets)))
+
+    return anchors
@@ -1,90 +1,259 @@
-from itertools import combinations
-from typing import List, Tuple
+from functools import lru_cache
+from itertools import combinations, islice
+from typing import Dict, List, Optional, Tuple
 
-import networkx as nx
 import numpy as np
-from fastdtw import fastdtw
 from lanelet2.core import Lanelet
-from scipy.spatial.distance import euclidean
-from shapely.geometry import LineString
-from shapely.ops import substring
+from shapely.geometry import LineString, Polygon
 
 from lanelet2anchors.anchor_tools.anchor2linestring import _anchor2linestring
+from lanelet2anchors.anchor_tools.interpolate_lanelet import (
+    _coords_progress,
+    _interpolate_coords,
+)
 
+IOU_BUFFER_DISTANCE = 1.0
+DTW_NUM_POINTS = 100
+DTW_BAND = 10
+DTW_BATCH_SIZE = 64
 
-def sort_anchors(anchors: List[Tuple[Lanelet, ...]], distance_method: str):
-    centerlines = {
-        anchor: _anchor2linestring(anchor, "centerline") for anchor in anchors
-    }
 
-    G = nx.Graph()
+def sort_anchors(
+    anchors: List[Tuple[Lanelet, ...]],
+    distance_method: str,
+    coords_cache: Optional[Dict[Tuple[Lanelet, str], np.ndarray]] = None,
+):
+    anchors = list(dict.fromkeys(anchors))
+
+    # nothing to compare, the elimination below returns the last two anchors reversed
+    if len(anchors) < 3:
+        return list(reversed(anchors))
+
+    if coords_cache is None:
+        coords_cache = {}
 
-    for anchor in anchors:
-        G.add_node(anchor)
+    centerlines = [
+        _anchor2linestring(anchor, "centerline", coords_cache=coords_cache)
+        for anchor in anchors
+    ]
 
-    for (a1, l1), (a2, l2) in combinations(centerlines.items(), 2):
-        G.add_edge(a1, a2, weight=_line_distance(l1, l2, distance_method))
+    # symmetric distance matrix, pairs are ordered as by combinations
+    rows, cols = np.triu_indices(len(anchors), k=1)
+    distances = np.zeros((len(anchors), len(anchors)))
+    distances[rows, cols] = _pairwise_line_distances(centerlines, distance_method)
+    distances[cols, rows] = distances[rows, cols]
 
-    sorted_anchors = []
+    remaining = np.ones(len(anchors), dtype=bool)
 
-    while len(G) > 1:
-        node_weights = {
-            node: sum(edge[2] for edge in G.edges(node, data="weight"))
-            for node in G.nodes()
-        }
+    sorted_indices = []
 
-        node_to_remove = min(node_weights, key=node_weights.get)  # type: ignore
+    # the last two anchors share their only edge, so their order is kept
+    for _ in range(len(anchors) - 2):
+        # summed anew over the remaining anchors in index order, as the weighted graph
+        # degree was, so exact ties keep going to the earliest anchor
+        node_weights = np.cumsum(np.where(remaining, distances, 0), axis=1)[:, -1]
+        index_to_remove = int(np.argmin(np.where(remaining, node_weights, np.inf)))
 
-        G.remove_node(node_to_remove)
-        sorted_anchors.append(node_to_remove)
+        remaining[index_to_remove] = False
 
-    sorted_anchors.extend(G.nodes)
+        sorted_indices.append(index_to_remove)
 
-    return list(reversed(sorted_anchors))
+    sorted_indices.extend(np.flatnonzero(remaining))
 
+    return [anchors[index] for index in reversed(sorted_indices)]
 
-def _line_distance(l1: LineString, l2: LineString, method: str) -> float:
-    min_length = min(l1.length, l2.length)
 
-    l1 = substring(l1, 0, min_length)
-    l2 = substring(l2, 0, min_length)
+def _pairwise_line_distances(lines: List[LineString], method: str) -> List[float]:
+    coords = [np.array(line.coords) for line in lines]
+    progress = [_coords_progress(line_coords) for line_coords in coords]
 
     function_map = {
-        "iou": _line_iou_distance,
-        "dtw": _line_dtw_distance,
-        "hausdorff": _line_hausdorff_distance,
+        "iou": _pairwise_line_iou_distances,
+        "dtw": _pairwise_line_dtw_distances,
+        "hausdorff": _pairwise_line_hausdorff_distances,
     }
 
-    return function_map[method](l1=l1, l2=l2)
+    return function_map[method](coords, progress)
 
 
-def _line_iou_distance(l1: LineString, l2: LineString) -> float:
-    l1 = l1.buffer(1)
-    l2 = l2.buffer(1)
+def _trim_coords(coords: np.ndarray, progress: np.ndarray, length: float) -> np.ndarray:
+    # keep all points before the given length and end exactly at it
+    end = max(int(np.searchsorted(progress, length)), 1)
+    end_point = [
+        np.interp(length, progress, coords[:, 0]),
+        np.interp(length, progress, coords[:, 1]),
+    ]
 
-    intersection = l1.intersection(l2).area
-    union = l1.union(l2).area
+    return np.vstack([coords[:end], end_point])
 
-    return 1 - intersection / union
 
+def _pairwise_line_iou_distances(
+    coords: List[np.ndarray], progress: List[np.ndarray]
+) -> List[float]:
+    # buffers lie within the line bounds grown by the buffer distance
+    bounds = np.array([np.concatenate([c.min(axis=0), c.max(axis=0)]) for c in coords])
+    bounds[:, :2] -= IOU_BUFFER_DISTANCE
+    bounds[:, 2:] += IOU_BUFFER_DISTANCE
 
-def _line_dtw_distance(l1: LineString, l2: LineString) -> float:
-    l1 = _dense_sample_line(l1)
-    l2 = _dense_sample_line(l2)
+    overlaps = (
+        (bounds[:, None, 0] <= bounds[None, :, 2])
+        & (bounds[None, :, 0] <= bounds[:, None, 2])
+        & (bounds[:, None, 1] <= bounds[None, :, 3])
+        & (bounds[None, :, 1] <= bounds[:, None, 3])
+    )
 
-    l1_data = np.array(l1.coords.xy).squeeze().transpose(1, 0)
-    l2_data = np.array(l2.coords.xy).squeeze().transpose(1, 0)
+    # the shorter line of a pair is never trimmed, so most buffers are shared by pairs
+    buffers: Dict[Tuple[int, float], Tuple[Polygon, float]] = {}
 
-    distance, _ = fastdtw(l1_data, l2_data, dist=euclidean)
+    distances = []
+    for i, j in combinations(range(len(coords)), 2):
+        if not overlaps[i, j]:
+            distances.append(1.0)
+            continue
 
-    return distance
+        min_length = min(progress[i][-1], progress[j][-1])
 
+        buffer1, area1 = _buffered_line(coords, progress, i, min_length, buffers)
+        buffer2, area2 = _buffered_line(coords, progress, j, min_length, buffers)
 
-def _line_hausdorff_distance(l1: LineString, l2: LineString) -> float:
-    return l1.hausdorff_distance(l2)
+        intersection = buffer1.intersection(buffer2).area
+        union = area1 + area2 - intersection
 
+        distances.append(1 - intersection / union)
 
-def _dense_sample_line(line: LineString, num_points=100) -> LineString:
-    return LineString(
-        [line.interpolate(i, normalized=True) for i in np.linspace(0, 1, num_points)]
-    )
+    return distances
+
+
+def _buffered_line(
+    coords: List[np.ndarray],
+    progress: List[np.ndarray],
+    index: int,
+    length: float,
+    buffers: Dict[Tuple[int, float], Tuple[Polygon, float]],
+) -> Tuple[Polygon, float]:
+    if (index, length) not in buffers:
+        line = LineString(_trim_coords(coords[index], progress[index], length))
+        buffer = line.buffer(IOU_BUFFER_DISTANCE)
+        buffers[(index, length)] = (buffer, buffer.area)
+
+    return buffers[(index, length)]
+
+
+def _trimmed_line(
+    coords: List[np.ndarray],
+    progress: List[np.ndarray],
+    index: int,
+    length: float,
+    lines: Dict[Tuple[int, float], LineString],
+) -> LineString:
+    if (index, length) not in lines:
+        lines[(index, length)] = LineString(
+            _trim_coords(coords[index], progress[index], length)
+        )
+
+    return lines[(index, length)]
+
+
+def _pairwise_line_hausdorff_distances(
+    coords: List[np.ndarray], progress: List[np.ndarray]
+) -> List[float]:
+    # discrete Hausdorff distance of GEOS (vertices to line), with lines shared by pairs
+    lines: Dict[Tuple[int, float], LineString] = {}
+
+    distances = []
+    for i, j in combinations(range(len(coords)), 2):
+        min_length = min(progress[i][-1], progress[j][-1])
+
+        line1 = _trimmed_line(coords, progress, i, min_length, lines)
+        line2 = _trimmed_line(coords, progress, j, min_length, lines)
+
+        distances.append(line1.hausdorff_distance(line2))
+
+    return distances
+
+
+def _pairwise_line_dtw_distances(
+    coords: List[np.ndarray], progress: List[np.ndarray]
+) -> List[float]:
+    pairs = combinations(range(len(coords)), 2)
+
+    # the shorter line of a pair is never trimmed, so its resampling is shared by pairs
+    resampled: Dict[int, np.ndarray] = {}
+
+    # all pairs run through the same recurrence, batched to bound memory
+    distances: List[float] = []
+    for batch in iter(lambda: list(islice(pairs, DTW_BATCH_SIZE)), []):
+        data1 = np.empty((len(batch), DTW_NUM_POINTS, 2))
+        data2 = np.empty((len(batch), DTW_NUM_POINTS, 2))
+        for k, (i, j) in enumerate(batch):
+            min_length = min(progress[i][-1], progress[j][-1])
+
+            data1[k] = _resampled_line(coords, progress, i, min_length, resampled)
+            data2[k] = _resampled_line(coords, progress, j, min_length, resampled)
+
+        distances.extend(_banded_dtw(data1, data2, DTW_BAND).tolist())
+
+    return distances
+
+
+def _resampled_line(
+    coords: List[np.ndarray],
+    progress: List[np.ndarray],
+    index: int,
+    length: float,
+    resampled: Dict[int, np.ndarray],
+) -> np.ndarray:
+    # trimmed lines depend on the pair, only whole lines are kept
+    is_trimmed = length < progress[index][-1]
+
+    if is_trimmed or index not in resampled:
+        trimmed = _trim_coords(coords[index], progress[index], length)
+        line = _interpolate_coords(trimmed, DTW_NUM_POINTS)
+
+        if is_trimmed:
+            return line
+
+        resampled[index] = line
+
+    return resampled[index]
+
+
+def _banded_dtw(data1: np.ndarray, data2: np.ndarray, band: int) -> np.ndarray:
+    num_pairs, n, m = len(data1), data1.shape[1], data2.shape[1]
+
+    cost = np.sqrt(np.sum((data1[:, :, None] - data2[:, None]) ** 2, axis=-1))
+    cost = cost.reshape(num_pairs, n * m)
+    accumulated = np.full((num_pairs, (n + 1) * (m + 1)), np.inf)
+    accumulated[:, 0] = 0
+
+    # cells of an anti-diagonal only depend on the two previous anti-diagonals
+    for cells, costs, diagonal, up, left in _dtw_diagonals(n, m, band):
+        accumulated[:, cells] = cost[:, costs] + np.minimum(
+            accumulated[:, diagonal],
+            np.minimum(accumulated[:, up], accumulated[:, left]),
+        )
+
+    return accumulated[:, -1]
+
+
+# flat cell, cost and predecessor indices per banded anti-diagonal, built once per shape
+@lru_cache(maxsize=None)
+def _dtw_diagonals(
+    n: int, m: int, band: int
+) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    band = max(band, abs(n - m))
+
+    diagonals = []
+    for diagonal in range(2, n + m + 1):
+        i = np.arange(
+            max(1, diagonal - m, (diagonal - band + 1) // 2),
+            min(n, diagonal - 1, (diagonal + band) // 2) + 1,
+        )
+        j = diagonal - i
+
+        cells = i * (m + 1) + j
+        diagonals.append(
+            (cells, (i - 1) * m + j - 1, cells - m - 2, cells - m - 1, cells - 1)
+        )
+
+    return diagonals
@@ -1,15 +1,18 @@
-from collections import Counter
+from collections import Counter, OrderedDict
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 import lanelet2
 import numpy as np
+from lanelet2.core import Lanelet
 from lanelet2.io import Origin
 from lanelet2.matching import getDeterministicMatches, getProbabilisticMatches
 from lanelet2.projection import UtmProjector
+from lanelet2.routing import LaneletRelation
 from shapely.geometry import LineString
 
 from .anchor_generation import Anchor, create_anchors_for_lanelet
+from .anchor_generation.discover_anchors import _lanelet_lengths
 from .anchor_tools.interpolate_lanelet import interpolate_lanelet
 from .anchor_tools.lanelet_matching import (
     LaneletAnchorMatches,
@@ -20,7 +23,7 @@ from .anchor_tools.lanelet_matching import (
     _convert_distances_to_probabilities,
 )
 
-# TODO remove matplotlib dependency when importing this file -> not needed for package installation (only examples)
+ANCHORS_CACHE_SIZE = 4096
 
 
 class AnchorGenerator:
@@ -46,6 +49,12 @@ class AnchorGenerator:
         self.matching_config: Union[
             LaneletMatchingConfig, LaneletMatchingProbConfig
         ] = LaneletMatchingProbConfig()
+        self._relations_cache: Dict[Lanelet, List[LaneletRelation]] = {}
+        self._lanelet_lengths = _lanelet_lengths(self.lanelet_map)
+        self._coords_cache: Dict[Tuple[Lanelet, str], np.ndarray] = {}
+        self._anchors_cache: "OrderedDict[Tuple[int, float, str], List[Anchor]]" = (
+            OrderedDict()
+        )
 
     @property
     def lanelet_ids(self) -> List[int]:
@@ -72,13 +81,28 @@ class AnchorGenerator:
         Returns:
             List[Anchor]: Sorted list of all anchors. The most important anchor is at index 0.
         """
-        return create_anchors_for_lanelet(
-            lanelet_map=self.lanelet_map,
-            routing_graph=self.routing_graph,
-            lanelet_id=lanelet_id,
-            max_length=anchor_length,
-            distance_method=distance_method,
-        )
+        key = (lanelet_id, anchor_length, distance_method)
+
+        if key in self._anchors_cache:
+            self._anchors_cache.move_to_end(key)
+        else:
+            self._anchors_cache[key] = create_anchors_for_lanelet(
+                lanelet_map=self.lanelet_map,
+                routing_graph=self.routing_graph,
+                lanelet_id=lanelet_id,
+                max_length=anchor_length,
+                distance_method=distance_method,
+                relations_cache=self._relations_cache,
+                lanelet_lengths=self._lanelet_lengths,
+                coords_cache=self._coords_cache,
+            )
+
+            # least recently used anchors are dropped first
+            if len(self._anchors_cache) > ANCHORS_CACHE_SIZE:
+                self._anchors_cache.popitem(last=False)
+
+        # anchors are mutable, callers get their own copies of the cached ones
+        return [Anchor(lanelets=anchor.lanelets) for anchor in self._anchors_cache[key]]
 
     def interpolate_lanelet(
         self,
@@ -101,6 +125,7 @@ class AnchorGenerator:
             lanelet_id=lanelet_id,
             ratio=ratio,
             num_points=num_points,
+            coords_cache=self._coords_cache,
         )
 
     def match_vehicle_onto_lanelets_deterministically(
@@ -198,17 +223,17 @@ class AnchorGenerator:
         lanelet_probs = np.asarray([m.probability for m in lanelet_matches.values()])
         if len(lanelet_probs) == 0:
             return []
-        samples = Counter(
-            np.random.choice(
-                list(lanelet_matches.keys()),
-                size=num_anchors,
-                p=list(lanelet_probs / np.sum(lanelet_probs)),
-            )
+        lanelet_ids = np.fromiter(
+            lanelet_matches.keys(), dtype=np.int64, count=len(lanelet_matches)
+        )
+        sample_indices = np.random.choice(
+            len(lanelet_ids), size=num_anchors, p=lanelet_probs / np.sum(lanelet_probs)
         )
+        samples = Counter(lanelet_ids[sample_indices].tolist())
         anchor_paths = []
-        for ll_id, num_anchors in dict(samples).items():
+        for ll_id, num_anchors in samples.items():
             ll_anchors = self.create_anchors_for_lanelet(
-                lanelet_id=int(ll_id),
+                lanelet_id=ll_id,
                 anchor_length=anchor_length,
             )
 
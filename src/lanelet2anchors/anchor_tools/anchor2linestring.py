@@ -1,3 +1,4 @@
+import math
 from itertools import groupby, zip_longest
 from typing import Dict, List, Optional, Tuple
 
@@ -8,11 +9,15 @@ from shapely.geometry import LineString, Point
 from shapely.ops import substring
 
 from ..anchor_generation.anchor import Anchor
+from .interpolate_lanelet import _interpolate_coords, _lanelet2coords
 
 SMOOTH_INTERPOLATOR = scipy.interpolate.PchipInterpolator(
     np.array([-1, 0, 1, 2]), np.array([0, 0, 1, 1]), axis=0, extrapolate=None
 )
 
+BLEND_NUM_POINTS = 100
+BLEND_WEIGHTS = SMOOTH_INTERPOLATOR(np.linspace(0, 1, BLEND_NUM_POINTS))[:, None]
+
 LINE_TYPE_MAP = {"left": "leftBound", "right": "rightBound", "center": "centerline"}
 
 
@@ -46,10 +51,11 @@ def _anchor2linestring(
     lanelets: Tuple[Lanelet, ...],
     lanlet2_line_type: str,
     trim_point: Optional[Point] = None,
+    coords_cache: Optional[Dict[Tuple[Lanelet, str], np.ndarray]] = None,
 ) -> LineString:
     # gather all lines
     lines = [
-        LineString([Point(pos.x, pos.y) for pos in getattr(lanelet, lanlet2_line_type)])
+        LineString(_lanelet2coords(lanelet, lanlet2_line_type, coords_cache))
         for lanelet in lanelets
     ]
 
@@ -76,9 +82,9 @@ def _combine_linestrings(
 ) -> LineString:
     def is_lane_change(pair):
         l1, l2 = pair
-        end_point = Point(l1.coords[-1])
-        start_point = Point(l2.coords[0]) if l2 else end_point
-        return start_point.distance(end_point) > close_points_threshold
+        end_point = l1.coords[-1]
+        start_point = l2.coords[0] if l2 else end_point
+        return math.dist(start_point, end_point) > close_points_threshold
 
     # list all consecutive pairs
     all_pairs = list(zip_longest(lines, lines[1:]))
@@ -114,15 +120,8 @@ def _concat_linestrings(line1: LineString, line2: LineString) -> LineString:
     return LineString(list(line1.coords) + list(line2.coords))
 
 
-def _blend_linestrings_smoothely(
-    line1: LineString, line2: LineString, num_points: int = 100
-) -> LineString:
-    return LineString(
-        [
-            np.array(line1.interpolate(alpha, normalized=True).coords).squeeze(0)
-            * (1 - SMOOTH_INTERPOLATOR(alpha))
-            + np.array(line2.interpolate(alpha, normalized=True).coords).squeeze(0)
-            * SMOOTH_INTERPOLATOR(alpha)
-            for alpha in np.linspace(0, 1, num_points)
-        ]
-    )
+def _blend_linestrings_smoothely(line1: LineString, line2: LineString) -> LineString:
+    points1 = _interpolate_coords(np.array(line1.coords), BLEND_NUM_POINTS)
+    points2 = _interpolate_coords(np.array(line2.coords), BLEND_NUM_POINTS)
+
+    return LineString(points1 * (1 - BLEND_WEIGHTS) + points2 * BLEND_WEIGHTS)
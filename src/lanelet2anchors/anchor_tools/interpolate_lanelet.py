@@ -1,5 +1,7 @@
+from typing import Dict, Optional, Tuple
+
 import numpy as np
-from lanelet2.core import LaneletMap
+from lanelet2.core import ConstLineString3d, Lanelet, LaneletMap
 from shapely.geometry import LineString
 
 
@@ -8,27 +10,60 @@ def interpolate_lanelet(
     lanelet_id: int,
     ratio: float,
     num_points: int = 100,
+    coords_cache: Optional[Dict[Tuple[Lanelet, str], np.ndarray]] = None,
 ) -> LineString:
     lanelet = lanelet_map.laneletLayer[lanelet_id]
 
-    left_border = np.array([(point.x, point.y) for point in lanelet.leftBound])
-    right_border = np.array([(point.x, point.y) for point in lanelet.rightBound])
+    left_border = _lanelet2coords(lanelet, "leftBound", coords_cache)
+    right_border = _lanelet2coords(lanelet, "rightBound", coords_cache)
 
-    left_linestring = LineString(left_border)
-    right_linestring = LineString(right_border)
+    left_border_interp = _interpolate_coords(left_border, num_points)
+    right_border_interp = _interpolate_coords(right_border, num_points)
 
-    left_border_interp = np.array(
-        [
-            left_linestring.interpolate(i, normalized=True).xy
-            for i in np.linspace(0, 1, num_points)
-        ]
-    ).squeeze()
-    right_border_interp = np.array(
+    interp_data = left_border_interp * ratio + right_border_interp * (1 - ratio)
+    return LineString(interp_data)
+
+
+def _lanelet2coords(
+    lanelet: Lanelet,
+    lanlet2_line_type: str,
+    coords_cache: Optional[Dict[Tuple[Lanelet, str], np.ndarray]] = None,
+) -> np.ndarray:
+    if coords_cache is None:
+        return _linestring2coords(getattr(lanelet, lanlet2_line_type))
+
+    # lanelets compare by map data and orientation, not only by id
+    key = (lanelet, lanlet2_line_type)
+
+    if key not in coords_cache:
+        coords_cache[key] = _linestring2coords(getattr(lanelet, lanlet2_line_type))
+
+    return coords_cache[key]
+
+
+def _linestring2coords(linestring: ConstLineString3d) -> np.ndarray:
+    coords = np.empty((len(linestring), 2), dtype=np.float64)
+
+    for i, point in enumerate(linestring):
+        coords[i] = point.x, point.y
+
+    return coords
+
+
+def _interpolate_coords(coords: np.ndarray, num_points: int) -> np.ndarray:
+    # equally spaced samples by arc length, as LineString.interpolate(normalized=True)
+    progress = _coords_progress(coords)
+    samples = np.linspace(0, progress[-1], num_points)
+
+    return np.column_stack(
         [
-            right_linestring.interpolate(i, normalized=True).xy
-            for i in np.linspace(0, 1, num_points)
+            np.interp(samples, progress, coords[:, 0]),
+            np.interp(samples, progress, coords[:, 1]),
         ]
-    ).squeeze()
+    )
 
-    interp_data = left_border_interp * ratio + right_border_interp * (1 - ratio)
-    return LineString(interp_data)
+
+def _coords_progress(coords: np.ndarray) -> np.ndarray:
+    # distance along the polyline for each of its points
+    segments = np.diff(coords, axis=0)
+    return np.concatenate([[0], np.cumsum(np.hypot(*segments.T))])
@@ -3,7 +3,6 @@ from dataclasses import dataclass
 from typing import Dict, List, Union
 
 import lanelet2
-import matplotlib.pyplot as plt
 import numpy as np
 from lanelet2.core import BasicPoint2d, Lanelet, LaneletMap
 from lanelet2.matching import (
@@ -1,12 +1,16 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from lanelet2.core import Lanelet
 from shapely.geometry import Point
 
 from ..anchor_generation import Anchor
 from ..anchor_tools.anchor2linestring import _anchor2linestring
 
+# segment starts, directions, squared lengths, lengths and offsets along the line
+LineSegments = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
 
 @dataclass
 class Vehicle:
@@ -51,9 +55,19 @@ def find_vehicle_ahead(
     Returns:
         Dict[Anchor, Optional[VehicleAhead]]: Returns the vehicle ahead along each anchor per anchor, if any exists.
     """
+    lanelet2positions: Dict[Lanelet, np.ndarray] = {}
+    center_lines: Dict[Tuple[Lanelet, ...], LineSegments] = {}
+    coords_cache: Dict[Tuple[Lanelet, str], np.ndarray] = {}
+
     return {
         anchor: _find_vehicle_ahead(
-            anchor, lanelet2vehicle, current_position, min_ahead_distance
+            anchor,
+            lanelet2vehicle,
+            lanelet2positions,
+            current_position,
+            min_ahead_distance,
+            center_lines,
+            coords_cache,
         )
         for anchor in anchors
     }
@@ -62,20 +76,87 @@ def find_vehicle_ahead(
 def _find_vehicle_ahead(
     anchor: Anchor,
     lanlet2vehicle: Dict[Lanelet, List[Vehicle]],
+    lanelet2positions: Dict[Lanelet, np.ndarray],
     current_position: Point,
     min_ahead_distance: float,
+    center_lines: Dict[Tuple[Lanelet, ...], LineSegments],
+    coords_cache: Dict[Tuple[Lanelet, str], np.ndarray],
 ) -> Optional[VehicleAhead]:
-    center_line = _anchor2linestring(anchor.lanelets, "centerline", current_position)
-
-    projections = [
-        VehicleAhead(vehicle=vehicle, distance=center_line.project(vehicle.position))
+    positions = [
+        _vehicle_positions(lanelet, lanlet2vehicle, lanelet2positions)
         for lanelet in anchor.lanelets
-        for vehicle in lanlet2vehicle[lanelet]
     ]
 
-    projections = list(filter(lambda x: x.distance > min_ahead_distance, projections))
+    if sum(len(lanelet_positions) for lanelet_positions in positions) == 0:
+        return None
+
+    if anchor.lanelets not in center_lines:
+        center_line = _anchor2linestring(
+            anchor.lanelets, "centerline", current_position, coords_cache
+        )
+        center_lines[anchor.lanelets] = _line_segments(np.asarray(center_line.coords))
 
-    if len(projections) == 0:
+    distances = _project_points(
+        center_lines[anchor.lanelets], np.concatenate(positions)
+    )
+
+    # vehicles too close count as infinitely far away, so one argmin finds the nearest
+    distances = np.where(distances > min_ahead_distance, distances, np.inf)
+    index = int(np.argmin(distances))
+    distance = float(distances[index])
+
+    if np.isinf(distance):
         return None
 
-    return list(sorted(projections, key=lambda x: x.distance))[0]
+    # map the index into the concatenated positions back to its lanelet
+    for lanelet, lanelet_positions in zip(anchor.lanelets, positions):
+        if index < len(lanelet_positions):
+            vehicle = lanlet2vehicle[lanelet][index]
+            break
+        index -= len(lanelet_positions)
+
+    return VehicleAhead(vehicle=vehicle, distance=distance)
+
+
+def _vehicle_positions(
+    lanelet: Lanelet,
+    lanlet2vehicle: Dict[Lanelet, List[Vehicle]],
+    lanelet2positions: Dict[Lanelet, np.ndarray],
+) -> np.ndarray:
+    if lanelet not in lanelet2positions:
+        lanelet2positions[lanelet] = np.array(
+            [
+                (vehicle.position.x, vehicle.position.y)
+                for vehicle in lanlet2vehicle[lanelet]
+            ]
+        ).reshape(-1, 2)
+
+    return lanelet2positions[lanelet]
+
+
+def _line_segments(coords: np.ndarray) -> LineSegments:
+    starts, deltas = coords[:-1], np.diff(coords, axis=0)
+    squared_lengths = np.sum(deltas**2, axis=1)
+    lengths = np.sqrt(squared_lengths)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    return starts, deltas, squared_lengths, lengths, offsets
+
+
+def _project_points(segments: LineSegments, points: np.ndarray) -> np.ndarray:
+    # same as LineString.project for all points at once, the first closest segment wins
+    starts, deltas, squared_lengths, lengths, offsets = segments
+
+    relative = points[:, None] - starts
+    factors = np.sum(relative * deltas, axis=-1)
+    factors = np.divide(
+        factors, squared_lengths, out=np.zeros_like(factors), where=squared_lengths > 0
+    )
+    factors = np.clip(factors, 0, 1)
+
+    distances = np.hypot(*np.moveaxis(relative - factors[..., None] * deltas, -1, 0))
+    closest = np.argmin(distances, axis=1)
+
+    return (
+        offsets[closest] + factors[np.arange(len(points)), closest] * lengths[closest]
+    )
@@ -1,3 +1,5 @@
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 from typing import Dict, List, Union
 
@@ -5,9 +7,10 @@ import matplotlib.patches as patches
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib import transforms
+from matplotlib.collections import LineCollection, PolyCollection
 from nuscenes.map_expansion.map_api import NuScenesMap
 from PIL import Image
-from shapely.geometry import GeometryCollection, LineString, Point, Polygon
+from shapely.geometry import LineString, Point, Polygon
 
 from ..anchor_generation.anchor import Anchor
 from ..anchor_tools.anchor2polygon import anchor2polygon
@@ -26,6 +29,7 @@ def plot_trajectory_and_anchors(
 ):
     """Visualize vehicle, GT trajectory and anchor paths.
     NOTE: This is only supported for nuScenes and when installing the DEV version: `pip install lanelet2anchors[dev]`
+    NOTE: Anchors and lanelets are rasterized in vector outputs, pass a `dpi` to `savefig` to control their resolution.
 
     Args:
         gt_trajectory (LineString): ground truth trajector of vehicle
@@ -39,31 +43,32 @@ def plot_trajectory_and_anchors(
     """
     bbox_car = vehicle_pose.bbox_as_shapely_polygon()
     #  Get all anchors
-    all_anchors = sum([match.anchors for match in anchors_info], [])
-    all_anchor_linestrings = [
-        anchor2linestring(a, "center", bbox_car.centroid) for a in all_anchors
-    ]
+    all_anchors = list(chain.from_iterable(match.anchors for match in anchors_info))
     # Get selected anchors
-    selected_anchors = sum([match.selected_anchors for match in anchors_info], [])
-    selected_anchor_linestrings = [
-        anchor2linestring(a, "center", bbox_car.centroid) for a in selected_anchors
-    ]
-    lanelets = [
-        {
-            "poly": anchor2polygon(Anchor([lanelet_anchors.lanelet_match.lanelet])),
-            "prob": lanelet_anchors.lanelet_match.probability,
-        }
-        for lanelet_anchors in anchors_info
-    ]
+    selected_anchors = list(
+        chain.from_iterable(match.selected_anchors for match in anchors_info)
+    )
+    # selected anchors are a subset of all anchors, convert each anchor only once
+    trim_point = bbox_car.centroid
+    anchor_linestrings = {
+        anchor: anchor2linestring(anchor, "center", trim_point)
+        for anchor in dict.fromkeys(all_anchors + selected_anchors)
+    }
+    all_anchor_linestrings = [anchor_linestrings[a] for a in all_anchors]
+    selected_anchor_linestrings = [anchor_linestrings[a] for a in selected_anchors]
+    # all anchors define the bounds, so every visualization type shares the framing
     linestrings = all_anchor_linestrings + [gt_trajectory]
-    obj = GeometryCollection(linestrings + [bbox_car])
+    coords = np.concatenate(
+        [np.asarray(linestring.coords)[:, :2] for linestring in linestrings]
+        + [np.asarray(bbox_car.exterior.coords)[:, :2]]
+    )
 
     fig, ax = _get_nusc_patch_within_bounds(
-        nusc_map, render_bounds=_compute_render_bounds(obj)
+        nusc_map, render_bounds=_compute_render_bounds(coords)
     )
 
     if vis_type == "map":
-        pass
+        return fig, ax
     if vis_type in [
         "agent",
         "matches",
@@ -72,30 +77,64 @@ def plot_trajectory_and_anchors(
         "gt_dmap",
         "all_dmap",
     ]:
-        ax.fill(*bbox_car.exterior.xy, color="red", linewidth=5)
-        # img, extent = _get_rotated_vehicle_visualization(vehicle_pose)
-        # ax.imshow(img, extent=extent, alpha=1.0, zorder=10)
+        ax.add_patch(
+            patches.Polygon(
+                np.asarray(bbox_car.exterior.coords), color="red", linewidth=5
+            )
+        )
+        # img, extent, angle = _get_rotated_vehicle_visualization(vehicle_pose)
+        # car = ax.imshow(img, extent=extent, alpha=1.0, zorder=10)
+        # car.set_transform(
+        #     transforms.Affine2D().rotate_deg_around(
+        #         vehicle_pose.x, vehicle_pose.y, angle
+        #     )
+        #     + ax.transData
+        # )
     if vis_type in ["matches", "all_dmap"]:
+        lanelets = [
+            {
+                "poly": anchor2polygon(Anchor([lanelet_anchors.lanelet_match.lanelet])),
+                "prob": lanelet_anchors.lanelet_match.probability,
+            }
+            for lanelet_anchors in anchors_info
+        ]
+        polygons = PolyCollection(
+            [np.asarray(info["poly"].exterior.coords) for info in lanelets],
+            facecolors="none",
+            edgecolors=plt.cm.tab10(np.arange(len(lanelets)) % 10),
+            linewidths=1.5,
+            zorder=2,
+            rasterized=True,
+        )
+        ax.add_collection(polygons)
         for lanelet_info in lanelets:
-            ax.plot(*lanelet_info["poly"].exterior.xy, label=f"Start lanelet")
-            ax.text(
-                lanelet_info["poly"].centroid.x,
-                lanelet_info["poly"].centroid.y,
-                f"{round(lanelet_info['prob'] * 100)}%",
-            )
+            centroid = lanelet_info["poly"].centroid
+            ax.text(centroid.x, centroid.y, f"{round(lanelet_info['prob'] * 100)}%")
     if vis_type == "all_anchors":
-        for idx, linestring in enumerate(all_anchor_linestrings):
-            ax.plot(*linestring.xy, linewidth=3, alpha=0.5, label=f"Anchor {idx}")
+        _plot_linestrings(ax, all_anchor_linestrings)
     if vis_type in ["dmap_anchors", "gt_dmap", "all_dmap"]:
-        for idx, linestring in enumerate(selected_anchor_linestrings):
-            ax.plot(*linestring.xy, linewidth=3, alpha=0.5, label=f"Anchor {idx}")
+        _plot_linestrings(ax, selected_anchor_linestrings)
     if vis_type in ["gt_dmap", "all_dmap"]:
-        ax.plot(*gt_trajectory.xy, color="blue", linewidth=4)
+        gt_coords = np.asarray(gt_trajectory.coords)
+        ax.plot(gt_coords[:, 0], gt_coords[:, 1], color="blue", linewidth=4)
     return fig, ax
 
 
-def _compute_render_bounds(obj):
-    bounds = [i for i in obj.bounds]
+def _plot_linestrings(ax, linestrings: List[LineString]):
+    # a single collection draws all lines at once instead of one artist per line
+    lines = LineCollection(
+        [np.asarray(linestring.coords) for linestring in linestrings],
+        linewidths=3,
+        alpha=0.5,
+        colors=plt.cm.tab20(np.arange(len(linestrings)) % 20),
+        zorder=2,
+        rasterized=True,
+    )
+    ax.add_collection(lines)
+
+
+def _compute_render_bounds(coords: np.ndarray) -> List[float]:
+    bounds = [*coords.min(axis=0).tolist(), *coords.max(axis=0).tolist()]
     delta_x = bounds[2] - bounds[0]
     delta_y = bounds[3] - bounds[1]
     diff = abs(delta_x - delta_y)
@@ -124,24 +163,21 @@ def _get_nusc_patch_within_bounds(nusc_map: NuScenesMap, render_bounds: List[flo
 
 
 def _get_rotated_vehicle_visualization(vehicle_pose: VehiclePose):
-    # prepare iamge
-    img = Image.open(ROOT / "misc/car-top-view-icon.png")
-
     factor = 1.3
     width = vehicle_pose.width * factor
     height = vehicle_pose.length * factor
     angle = np.rad2deg(vehicle_pose.psi) + 90
 
-    aspect_ratio = width / height
-    if height > width:
-        shape = int(img.height * aspect_ratio), img.height
-    else:
-        shape = img.width, int(img.width / aspect_ratio)
+    # upright frame around the vehicle, the rotation is applied as transform when drawing
+    extent = [
+        vehicle_pose.x - width / 2,
+        vehicle_pose.x + width / 2,
+        vehicle_pose.y - height / 2,
+        vehicle_pose.y + height / 2,
+    ]
+    return _load_vehicle_image(), extent, angle
 
-    img_quality = img.copy()
-    img_quality = img_quality.resize(shape)
-    img_quality = img_quality.rotate(angle, expand=True)
 
-    # caclculate frame
-    minx, miny, maxx, maxy = vehicle_pose.bbox_as_shapely_polygon().bounds
-    return img_quality, [minx, maxx, miny, maxy]
+@lru_cache(maxsize=None)
+def _load_vehicle_image() -> np.ndarray:
+    return np.asarray(Image.open(ROOT / "misc/car-top-view-icon.png").convert("RGBA"))